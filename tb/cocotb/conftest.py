@@ -0,0 +1,8 @@
+"""
+pytest configuration for the cocotb testbench.
+
+test_pcs_10g.py holds the cocotb tests themselves; they only run inside a
+simulator, so pytest collects test_runner.py instead.
+"""
+
+collect_ignore = ["test_pcs_10g.py"]
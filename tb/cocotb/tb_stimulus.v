@@ -0,0 +1,293 @@
+// =============================================================================
+// tb_stimulus.v — cocotb Wrapper for 10GBASE-R PCS Core
+// =============================================================================
+// Thin HDL-side harness around pcs_10g_top for the cocotb testbench:
+//   - Clock: 644 MHz (1.553 ns period) generated here, not from Python
+//   - SERDES loopback: TX gearbox output feeds the RX gearbox input
+//   - Stimulus ROM: XGMII words played from $readmemh images so Python
+//     only arms the sequencer instead of driving every clock edge
+//   - Idle burst: counter that drives N idle words without a ROM image
+//   - Frame sender: Start → frame_words[0..nwords-1] → Terminate sequence
+//   - RX event wires so Python can wait on an edge instead of polling
+//
+// Stimulus ROM protocol (txd and txc held as separate arrays):
+//   1. Python writes STIM_TXD_FILE (one txd[63:0] word per line) and
+//      STIM_TXC_FILE (one txc[7:0] word per line)
+//   2. Rising edge on stim_load reloads both ROMs
+//   3. stim_len = number of words, rising edge on stim_go starts playback
+//   4. Words 0..stim_len-1 are presented on consecutive clocks, then
+//      stim_done pulses for one cycle
+//
+// Idle burst protocol:
+//   idle_count = number of idle words, rising edge on burst_go starts the
+//   burst, burst_done pulses for one cycle after the last idle word
+//
+// Frame sender protocol:
+//   Python writes frame_words[0..nwords-1] (depth 16) and nwords, rising
+//   edge on send_go sends Start (lane 0), the data words and Terminate
+//   (lane 0), then send_done pulses for one cycle
+//
+// stim_go, burst_go and send_go are sampled on clk: each must be low for
+// at least one clock before it is raised again, or the rising edge is
+// missed and no done pulse follows.
+//
+// TX source priority: frame sender, stimulus ROM, idle burst, then
+// xgmii_txd/xgmii_txc straight through.
+// =============================================================================
+
+`timescale 1ns / 1ps
+
+module tb_stimulus #(
+    parameter STIM_TXD_FILE = "stim_txd.hex",
+    parameter STIM_TXC_FILE = "stim_txc.hex",
+    parameter STIM_DEPTH    = 1024
+) (
+    // ---- Reset (clock is generated internally) ----
+    input  wire        rst_n,
+
+    // ---- XGMII TX (direct drive, used when no generator is active) ----
+    input  wire [63:0] xgmii_txd,
+    input  wire [7:0]  xgmii_txc,
+
+    // ---- XGMII RX ----
+    output wire [63:0] xgmii_rxd,
+    output wire [7:0]  xgmii_rxc,
+
+    // ---- Status ----
+    output wire        block_lock,
+    output wire        hi_ber,
+    output wire        pcs_status,
+    output wire        rx_link_up,
+    output wire        tx_encode_err,
+    output wire        rx_decode_err,
+    output wire [15:0] ber_count,
+    output wire [7:0]  errored_blocks,
+    output wire        pcs_status_ll,
+
+    // ---- RX events ----
+    output wire        rx_start,        // Start character in RX lane 0
+    output wire        rx_data_nonidle, // All-data RX word that is not idle
+
+    // ---- Stimulus ROM control ----
+    input  wire        stim_load,     // Rising edge: reload ROMs from files
+    input  wire [10:0] stim_len,      // Number of ROM words to play
+    input  wire        stim_go,       // Rising edge: start playback
+    output reg         stim_done,     // One-cycle pulse after last word
+
+    // ---- Idle burst control ----
+    input  wire [15:0] idle_count,    // Number of idle words to send
+    input  wire        burst_go,      // Rising edge: start idle burst
+    output reg         burst_done,    // One-cycle pulse after last idle
+
+    // ---- Frame sender control (payload in frame_words[]) ----
+    input  wire [4:0]  nwords,        // Number of data words (0-16)
+    input  wire        send_go,       // Rising edge: send frame
+    output reg         send_done      // One-cycle pulse after Terminate
+);
+
+// 644 MHz → 1.553 ns, split into whole-ps phases so the period is exact
+localparam CLK_LOW  = 0.776;
+localparam CLK_HIGH = 0.777;
+
+localparam [63:0] IDLE_TXD  = {8{8'h07}};
+localparam [7:0]  IDLE_TXC  = 8'hFF;
+localparam [63:0] START_TXD = {8'hD5, {6{8'h55}}, 8'hFB};
+localparam [7:0]  START_TXC = 8'h01;
+localparam [63:0] TERM0_TXD = {{7{8'h07}}, 8'hFD};
+localparam [7:0]  TERM0_TXC = 8'hFF;
+
+// =========================================================================
+// Clock generation
+// =========================================================================
+reg clk;
+
+initial clk = 0;
+always begin
+    #CLK_LOW  clk = 1;
+    #CLK_HIGH clk = 0;
+end
+
+// =========================================================================
+// Stimulus ROM + sequencer
+// =========================================================================
+reg [63:0] stim_txd_rom [0:STIM_DEPTH-1];
+reg [7:0]  stim_txc_rom [0:STIM_DEPTH-1];
+
+always @(posedge stim_load) begin
+    $readmemh(STIM_TXD_FILE, stim_txd_rom);
+    $readmemh(STIM_TXC_FILE, stim_txc_rom);
+end
+
+reg [10:0] rd_ptr;
+reg        stim_busy;
+reg        stim_go_q;
+
+wire stim_start = stim_go & ~stim_go_q;
+
+always @(posedge clk or negedge rst_n) begin
+    if (!rst_n) begin
+        rd_ptr    <= 11'd0;
+        stim_busy <= 1'b0;
+        stim_go_q <= 1'b0;
+        stim_done <= 1'b0;
+    end else begin
+        stim_go_q <= stim_go;
+        stim_done <= 1'b0;
+
+        if (stim_start && !stim_busy) begin
+            rd_ptr    <= 11'd0;
+            stim_busy <= (stim_len != 11'd0);
+            stim_done <= (stim_len == 11'd0);
+        end else if (stim_busy) begin
+            rd_ptr <= rd_ptr + 11'd1;
+            if (rd_ptr == stim_len - 11'd1) begin
+                stim_busy <= 1'b0;
+                stim_done <= 1'b1;
+            end
+        end
+    end
+end
+
+// =========================================================================
+// Idle burst generator
+// =========================================================================
+reg [15:0] idle_left;
+reg        burst_go_q;
+
+wire burst_busy  = (idle_left != 16'd0);
+wire burst_start = burst_go & ~burst_go_q;
+
+always @(posedge clk or negedge rst_n) begin
+    if (!rst_n) begin
+        idle_left  <= 16'd0;
+        burst_go_q <= 1'b0;
+        burst_done <= 1'b0;
+    end else begin
+        burst_go_q <= burst_go;
+        burst_done <= 1'b0;
+
+        if (burst_start && !burst_busy) begin
+            idle_left  <= idle_count;
+            burst_done <= (idle_count == 16'd0);
+        end else if (burst_busy) begin
+            idle_left <= idle_left - 16'd1;
+            if (idle_left == 16'd1)
+                burst_done <= 1'b1;
+        end
+    end
+end
+
+// =========================================================================
+// Frame sender
+// =========================================================================
+localparam [1:0] FS_IDLE  = 2'd0,
+                 FS_START = 2'd1,
+                 FS_DATA  = 2'd2,
+                 FS_TERM  = 2'd3;
+
+reg [63:0] frame_words [0:15];   // Payload, written from Python
+
+reg [1:0]  fs_state;
+reg [3:0]  fs_idx;
+reg        send_go_q;
+
+wire send_busy  = (fs_state != FS_IDLE);
+wire send_start = send_go & ~send_go_q;
+
+always @(posedge clk or negedge rst_n) begin
+    if (!rst_n) begin
+        fs_state  <= FS_IDLE;
+        fs_idx    <= 4'd0;
+        send_go_q <= 1'b0;
+        send_done <= 1'b0;
+    end else begin
+        send_go_q <= send_go;
+        send_done <= 1'b0;
+
+        case (fs_state)
+            FS_IDLE: begin
+                if (send_start)
+                    fs_state <= FS_START;
+            end
+            FS_START: begin
+                fs_idx   <= 4'd0;
+                fs_state <= (nwords == 5'd0) ? FS_TERM : FS_DATA;
+            end
+            FS_DATA: begin
+                fs_idx <= fs_idx + 4'd1;
+                if ({1'b0, fs_idx} == nwords - 5'd1)
+                    fs_state <= FS_TERM;
+            end
+            FS_TERM: begin
+                fs_state  <= FS_IDLE;
+                send_done <= 1'b1;
+            end
+        endcase
+    end
+end
+
+reg [63:0] fs_txd;
+reg [7:0]  fs_txc;
+
+always @(*) begin
+    case (fs_state)
+        FS_START: begin fs_txd = START_TXD;           fs_txc = START_TXC; end
+        FS_DATA:  begin fs_txd = frame_words[fs_idx]; fs_txc = 8'h00;     end
+        default:  begin fs_txd = TERM0_TXD;           fs_txc = TERM0_TXC; end
+    endcase
+end
+
+// =========================================================================
+// TX source select
+// =========================================================================
+wire [63:0] dut_txd = send_busy  ? fs_txd               :
+                      stim_busy  ? stim_txd_rom[rd_ptr] :
+                      burst_busy ? IDLE_TXD             : xgmii_txd;
+wire [7:0]  dut_txc = send_busy  ? fs_txc               :
+                      stim_busy  ? stim_txc_rom[rd_ptr] :
+                      burst_busy ? IDLE_TXC             : xgmii_txc;
+
+// =========================================================================
+// DUT with SERDES loopback
+// =========================================================================
+wire [15:0] gth_txdata;
+wire [1:0]  gth_txheader;
+wire        gth_txdata_valid;
+
+pcs_10g_top #(
+    .INIT_IDLE_DISPATCH(1)
+) u_dut (
+    .clk               (clk),
+    .rst_n             (rst_n),
+    .xgmii_txd         (dut_txd),
+    .xgmii_txc         (dut_txc),
+    .xgmii_rxd         (xgmii_rxd),
+    .xgmii_rxc         (xgmii_rxc),
+    .gth_txdata        (gth_txdata),
+    .gth_txheader      (gth_txheader),
+    .gth_txdata_valid  (gth_txdata_valid),
+    .gth_rxdata        (gth_txdata),       // LOOPBACK
+    .gth_rxheader      (gth_txheader),     // LOOPBACK
+    .gth_rxdata_valid  (gth_txdata_valid), // LOOPBACK
+    .gth_rxheader_valid(gth_txdata_valid), // LOOPBACK
+    .gth_txsequence_done(),
+    .gth_rxgearboxslip (1'b0),
+    .block_lock        (block_lock),
+    .hi_ber            (hi_ber),
+    .pcs_status        (pcs_status),
+    .rx_link_up        (rx_link_up),
+    .tx_encode_err     (tx_encode_err),
+    .rx_decode_err     (rx_decode_err),
+    .ber_count         (ber_count),
+    .errored_blocks    (errored_blocks),
+    .status_read       (1'b0),
+    .pcs_status_ll     (pcs_status_ll)
+);
+
+// =========================================================================
+// RX event detection
+// =========================================================================
+assign rx_start        = xgmii_rxc[0] & (xgmii_rxd[7:0] == 8'hFB);
+assign rx_data_nonidle = (xgmii_rxc == 8'h00) & (xgmii_rxd != IDLE_TXD);
+
+endmodule
@@ -18,14 +18,18 @@ Tests:
   9. Latency measurement
  10. Error handling
 
+Toplevel: tb_stimulus (PCS core + SERDES loopback + stimulus ROM);
+the clock is generated in HDL, Python only waits on its edges.
+
 Requires: cocotb >= 2.0
 Simulator: Icarus Verilog (iverilog)
 ============================================================================
 """
 
+import logging
+
 import cocotb
-from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, ClockCycles
+from cocotb.triggers import RisingEdge, ClockCycles, First
 
 # XGMII Control Characters
 XGMII_IDLE  = 0x07
@@ -33,76 +37,173 @@ XGMII_START = 0xFB
 XGMII_TERM  = 0xFD
 XGMII_ERROR = 0xFE
 
+# Control character repeated in all 8 lanes, evaluated once at import
+XGMII_IDLE_BCAST  = 0x0101010101010101 * XGMII_IDLE   # 0x0707070707070707
+XGMII_ERROR_BCAST = 0x0101010101010101 * XGMII_ERROR  # 0xFEFEFEFEFEFEFEFE
+
 CLK_PERIOD_NS = 1.553  # 644 MHz
 
-# Global clock handle — start once, reuse across tests
-_clock_started = False
+# Stimulus ROM in tb_stimulus.v — separate txd/txc images written here,
+# loaded via $readmemh
+STIM_TXD_FILE  = "stim_txd.hex"
+STIM_TXC_FILE  = "stim_txc.hex"
+STIM_ROM_DEPTH = 1024
 
+# Frame sender payload depth in tb_stimulus.v (frame_words[0:15])
+FRAME_WORDS_MAX = 16
 
-def pack_xgmii_idle():
-    return (XGMII_IDLE * 0x0101010101010101, 0xFF)
+# Fixed XGMII words as (txd, txc) — lane 0 is the LSB
+IDLE_TXD    = XGMII_IDLE_BCAST  # I I I I I I I I
+IDLE_TXC    = 0xFF
+IDLE_TUPLE  = (IDLE_TXD, IDLE_TXC)
+START_TUPLE = (0xD5555555555555 << 8 | XGMII_START, 0x01)  # S + preamble + SFD
+TERM0_TUPLE = (0x07070707070707 << 8 | XGMII_TERM, 0xFF)    # T I I I I I I I
 
 
-def pack_xgmii_start():
-    txd = (0xD5 << 56) | (0x55 << 48) | (0x55 << 40) | (0x55 << 32) | \
-          (0x55 << 24) | (0x55 << 16) | (0x55 << 8) | XGMII_START
-    return (txd, 0x01)
+def pack_xgmii_data(data_64):
+    return (data_64 & 0xFFFFFFFFFFFFFFFF, 0x00)
 
 
-def pack_xgmii_term0():
-    txd = (XGMII_IDLE << 56) | (XGMII_IDLE << 48) | (XGMII_IDLE << 40) | \
-          (XGMII_IDLE << 32) | (XGMII_IDLE << 24) | (XGMII_IDLE << 16) | \
-          (XGMII_IDLE << 8) | XGMII_TERM
-    return (txd, 0xFF)
+def pack_xgmii_frame(words):
+    """Start, one data block per word, terminate in lane 0."""
+    return [START_TUPLE] + [pack_xgmii_data(w) for w in words] + [TERM0_TUPLE]
 
 
-def pack_xgmii_data(data_64):
-    return (data_64 & 0xFFFFFFFFFFFFFFFF, 0x00)
+def build_stream(tokens):
+    """Split (txd, txc) tokens into a (txd words, txc words) stream."""
+    txd_words = tuple(txd for txd, _ in tokens)
+    txc_words = tuple(txc for _, txc in tokens)
+    return (txd_words, txc_words)
+
+
+# Test payloads, built once at import instead of inside the tests
+FRAME_TX_WORDS = [0x0102030405060708 + (i * 0x1010101010101010) for i in range(4)]
 
+STREAM = build_stream(pack_xgmii_frame(
+    [(i & 0xFFFFFFFF) | ((i ^ 0xFFFFFFFF) << 32) for i in range(100)]))
 
-async def ensure_clock(dut):
-    """Start clock if not already running."""
-    global _clock_started
-    if not _clock_started:
-        clock = Clock(dut.clk, CLK_PERIOD_NS, units="ns")
-        cocotb.start_soon(clock.start())
-        _clock_started = True
+
+def build_b2b_stream(frames=10, ifg=20):
+    """Back-to-back 2-word frames, each followed by `ifg` idle words."""
+    tokens = []
+    for frame_num in range(frames):
+        words = [((frame_num & 0xFF) << 56) | ((j & 0xFF) << 48) | 0x112233445566
+                 for j in range(2)]
+        tokens += pack_xgmii_frame(words)
+        tokens += [IDLE_TUPLE] * ifg
+    return build_stream(tokens)
+
+
+B2B_STREAM = build_b2b_stream()
+
+
+def write_stim_rom(stream):
+    """Write a (txd words, txc words) stream as two $readmemh images."""
+    txd_words, txc_words = stream
+    with open(STIM_TXD_FILE, "w") as f:
+        f.write("".join(f"{txd:016X}\n" for txd in txd_words))
+    with open(STIM_TXC_FILE, "w") as f:
+        f.write("".join(f"{txc:02X}\n" for txc in txc_words))
+
+
+def drive_xgmii(dut, txd, txc):
+    """Drive the direct XGMII TX inputs."""
+    dut.xgmii_txd.value = txd
+    dut.xgmii_txc.value = txc
 
 
 async def reset_dut(dut):
     """Apply reset to the DUT."""
-    await ensure_clock(dut)
     dut.rst_n.value = 0
-    txd, txc = pack_xgmii_idle()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
+    dut.stim_load.value = 0
+    dut.stim_go.value = 0
+    dut.stim_len.value = 0
+    dut.burst_go.value = 0
+    dut.idle_count.value = 0
+    dut.send_go.value = 0
+    dut.nwords.value = 0
+    drive_xgmii(dut, IDLE_TXD, IDLE_TXC)
     await ClockCycles(dut.clk, 10)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 5)
 
 
+async def play_stimulus(dut, stream):
+    """Play a build_stream() stream from the HDL stimulus ROM.
+
+    Words go out one per clock; returns on the clock edge that samples the
+    last one. The direct XGMII inputs are parked at idle so the link idles
+    afterwards.
+    """
+    length = len(stream[0])
+    if length == 0:
+        return
+    assert length <= STIM_ROM_DEPTH, "Stimulus exceeds ROM depth"
+
+    drive_xgmii(dut, IDLE_TXD, IDLE_TXC)
+
+    write_stim_rom(stream)
+    dut.stim_load.value = 1
+    dut.stim_len.value = length
+    # Hold go for one clock so it is low again before the next call
+    dut.stim_go.value = 1
+    await RisingEdge(dut.clk)
+    dut.stim_go.value = 0
+    dut.stim_load.value = 0
+    await RisingEdge(dut.stim_done)
+
+
 async def send_idle(dut, count):
-    txd, txc = pack_xgmii_idle()
-    for _ in range(count):
-        dut.xgmii_txd.value = txd
-        dut.xgmii_txc.value = txc
-        await RisingEdge(dut.clk)
+    """Send `count` idle words from the HDL idle burst generator."""
+    assert count <= 0xFFFF, "Idle count exceeds idle_count width"
+    if count == 0:
+        return
+    drive_xgmii(dut, IDLE_TXD, IDLE_TXC)
+    dut.idle_count.value = count
+    dut.burst_go.value = 1
+    await RisingEdge(dut.clk)
+    dut.burst_go.value = 0
+    await RisingEdge(dut.burst_done)
+
+
+async def send_frame(dut, words):
+    """Send Start, data words and Terminate from the HDL frame sender."""
+    assert len(words) <= FRAME_WORDS_MAX, "Frame exceeds frame_words depth"
+    drive_xgmii(dut, IDLE_TXD, IDLE_TXC)
+    for i, word in enumerate(words):
+        dut.frame_words[i].value = word
+    dut.nwords.value = len(words)
+    dut.send_go.value = 1
+    await RisingEdge(dut.clk)
+    dut.send_go.value = 0
+    await RisingEdge(dut.send_done)
 
 
 async def wait_for_block_lock(dut, timeout=50000):
-    for i in range(timeout):
-        await RisingEdge(dut.clk)
-        if dut.block_lock.value == 1:
-            return i
-    return -1
+    """Wait for block_lock to rise; return the cycles waited, -1 on timeout."""
+    if dut.block_lock.value == 1:
+        return 0
+    start_steps = cocotb.utils.get_sim_time("step")
+    expired = ClockCycles(dut.clk, timeout)
+    if await First(RisingEdge(dut.block_lock), expired) is expired:
+        return -1
+    # Clocks up to the edge that raised block_lock, which is the index
+    # the old per-clock poll returned (it read the flop one edge late)
+    waited_ns = cocotb.utils.get_time_from_sim_steps(
+        cocotb.utils.get_sim_time("step") - start_steps, "ns")
+    return round(waited_ns / CLK_PERIOD_NS)
 
 
 async def establish_link(dut):
-    """Reset, send idle, and wait for block lock."""
+    """Reset and wait for block lock while TX idles."""
+    # reset_dut leaves the direct XGMII inputs parked at idle
     await reset_dut(dut)
-    await send_idle(dut, 200)
-    cycles = await wait_for_block_lock(dut, timeout=20000)
-    await send_idle(dut, 400)  # Extra stabilization
+    cycles = await wait_for_block_lock(dut, timeout=20200)
+    # Skip the extra stabilization once the lock has held for a while
+    # with hi_ber clear
+    await ClockCycles(dut.clk, 64)
+    if not (dut.block_lock.value == 1 and dut.hi_ber.value == 0):
+        await ClockCycles(dut.clk, 400)  # Extra stabilization
     return cycles
 
 
@@ -138,7 +239,7 @@ async def test_block_lock(dut):
     cycles = await establish_link(dut)
     assert dut.block_lock.value == 1, "Block lock should be acquired"
     assert dut.hi_ber.value == 0, "Hi-BER should be clear after lock"
-    if cycles >= 0:
+    if cycles >= 0 and dut._log.isEnabledFor(logging.INFO):
         dut._log.info(f"Block lock acquired after {cycles} cycles")
     dut._log.info("Test 3 PASSED: Block lock acquisition")
 
@@ -151,22 +252,7 @@ async def test_frame_tx(dut):
     """Test 4: Send a complete Ethernet frame through PCS."""
     await establish_link(dut)
 
-    txd, txc = pack_xgmii_start()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
-
-    for i in range(4):
-        data = 0x0102030405060708 + (i * 0x1010101010101010)
-        txd, txc = pack_xgmii_data(data)
-        dut.xgmii_txd.value = txd
-        dut.xgmii_txc.value = txc
-        await RisingEdge(dut.clk)
-
-    txd, txc = pack_xgmii_term0()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
+    await send_frame(dut, FRAME_TX_WORDS)
 
     await send_idle(dut, 200)
 
@@ -190,21 +276,7 @@ async def test_scrambler_roundtrip(dut):
         0x5555555555555555,
     ]
 
-    txd, txc = pack_xgmii_start()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
-
-    for data in test_data:
-        txd, txc = pack_xgmii_data(data)
-        dut.xgmii_txd.value = txd
-        dut.xgmii_txc.value = txc
-        await RisingEdge(dut.clk)
-
-    txd, txc = pack_xgmii_term0()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
+    await send_frame(dut, test_data)
 
     await send_idle(dut, 400)
 
@@ -220,25 +292,8 @@ async def test_back_to_back_frames(dut):
     """Test 6: Send multiple frames with minimum IFG."""
     await establish_link(dut)
 
-    for frame_num in range(10):
-        txd, txc = pack_xgmii_start()
-        dut.xgmii_txd.value = txd
-        dut.xgmii_txc.value = txc
-        await RisingEdge(dut.clk)
-
-        for j in range(2):
-            data = ((frame_num & 0xFF) << 56) | ((j & 0xFF) << 48) | 0x112233445566
-            txd, txc = pack_xgmii_data(data)
-            dut.xgmii_txd.value = txd
-            dut.xgmii_txc.value = txc
-            await RisingEdge(dut.clk)
-
-        txd, txc = pack_xgmii_term0()
-        dut.xgmii_txd.value = txd
-        dut.xgmii_txc.value = txc
-        await RisingEdge(dut.clk)
-
-        await send_idle(dut, 20)
+    # All ten frames and their 20-cycle IFGs in a single ROM burst
+    await play_stimulus(dut, B2B_STREAM)
 
     await send_idle(dut, 200)
 
@@ -269,22 +324,7 @@ async def test_continuous_stream(dut):
     """Test 8: Send 100-word continuous data stream."""
     await establish_link(dut)
 
-    txd, txc = pack_xgmii_start()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
-
-    for i in range(100):
-        data = (i & 0xFFFFFFFF) | ((i ^ 0xFFFFFFFF) << 32)
-        txd, txc = pack_xgmii_data(data & 0xFFFFFFFFFFFFFFFF)
-        dut.xgmii_txd.value = txd
-        dut.xgmii_txc.value = txc
-        await RisingEdge(dut.clk)
-
-    txd, txc = pack_xgmii_term0()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
+    await play_stimulus(dut, STREAM)
 
     await send_idle(dut, 200)
 
@@ -301,44 +341,34 @@ async def test_latency(dut):
     await establish_link(dut)
     await send_idle(dut, 800)
 
-    tx_time = cocotb.utils.get_sim_time(units="ns")
-
-    txd, txc = pack_xgmii_start()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
+    # Timestamps stay in integer sim steps; converted to ns once at the end
+    arm_steps = cocotb.utils.get_sim_time("step")
 
-    txd, txc = pack_xgmii_data(0xFEEDFACE12345678)
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
+    # The frame is out after 3 clocks, well inside the ~10-cycle loopback
+    # latency, so the RX watch starts before the Start can come back.
+    # The TX idles while we wait.
+    await send_frame(dut, [0xFEEDFACE12345678])
 
-    txd, txc = pack_xgmii_term0()
-    dut.xgmii_txd.value = txd
-    dut.xgmii_txc.value = txc
-    await RisingEdge(dut.clk)
+    # Wait on the wrapper's RX event wires instead of polling every clock
+    timeout = ClockCycles(dut.clk, 10000)
+    rx_event = await First(RisingEdge(dut.rx_start),
+                           RisingEdge(dut.rx_data_nonidle),
+                           timeout)
+    rx_steps = None
+    if rx_event is not timeout:
+        rx_steps = cocotb.utils.get_sim_time("step")
 
     await send_idle(dut, 20)
 
-    rx_time = None
-    for _ in range(10000):
-        await RisingEdge(dut.clk)
-        try:
-            rxc = int(dut.xgmii_rxc.value)
-            rxd = int(dut.xgmii_rxd.value)
-            if (rxc & 0x01) and ((rxd & 0xFF) == XGMII_START):
-                rx_time = cocotb.utils.get_sim_time(units="ns")
-                break
-            if rxc == 0x00 and rxd != (XGMII_IDLE * 0x0101010101010101):
-                rx_time = cocotb.utils.get_sim_time(units="ns")
-                break
-        except ValueError:
-            continue
-
-    if rx_time is not None:
-        latency_ns = rx_time - tx_time
-        latency_cycles = latency_ns / CLK_PERIOD_NS
-        dut._log.info(f"Loopback latency: {latency_ns:.1f} ns ({latency_cycles:.1f} cycles)")
+    if rx_steps is not None:
+        if dut._log.isEnabledFor(logging.INFO):
+            # Start goes out one clock after arming, and the old per-clock
+            # poll saw the RX word one clock after the event fires: the
+            # two offsets cancel
+            latency_ns = cocotb.utils.get_time_from_sim_steps(
+                rx_steps - arm_steps, "ns")
+            latency_cycles = latency_ns / CLK_PERIOD_NS
+            dut._log.info(f"Loopback latency: {latency_ns:.1f} ns ({latency_cycles:.1f} cycles)")
     else:
         dut._log.warning("Start marker not detected on RX within timeout")
 
@@ -354,8 +384,7 @@ async def test_error_handling(dut):
     await establish_link(dut)
 
     # Send XGMII error character (all-control error, which is valid encoding)
-    dut.xgmii_txd.value = XGMII_ERROR * 0x0101010101010101
-    dut.xgmii_txc.value = 0xFF
+    drive_xgmii(dut, XGMII_ERROR_BCAST, 0xFF)
     await RisingEdge(dut.clk)
 
     # Immediately return to idle
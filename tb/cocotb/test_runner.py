@@ -0,0 +1,81 @@
+"""
+============================================================================
+test_runner.py — Parallel cocotb Runner for 10GBASE-R PCS Core
+============================================================================
+Runs each cocotb test in test_pcs_10g.py in its own Icarus Verilog
+simulator process, so the ten tests can be spread across cores:
+
+    pytest -n auto test_runner.py        (requires pytest-xdist)
+
+Each test gets a private build/run directory under sim_build/, which also
+keeps the stimulus ROM images of one process away from the others.
+
+Requires: cocotb >= 2.0, pytest (pytest-xdist for -n)
+============================================================================
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("cocotb_tools.runner")
+
+from cocotb_tools.runner import get_runner  # noqa: E402
+
+TB_DIR  = Path(__file__).resolve().parent
+RTL_DIR = TB_DIR.parent.parent / "rtl"
+
+SOURCES = [
+    RTL_DIR / "pcs_10g_enc_64b66b.v",
+    RTL_DIR / "pcs_10g_dec_64b66b.v",
+    RTL_DIR / "pcs_10g_scrambler.v",
+    RTL_DIR / "pcs_10g_descrambler.v",
+    RTL_DIR / "pcs_10g_tx_gearbox.v",
+    RTL_DIR / "pcs_10g_rx_gearbox.v",
+    RTL_DIR / "pcs_10g_block_sync.v",
+    RTL_DIR / "pcs_10g_ber_monitor.v",
+    RTL_DIR / "pcs_10g_top.v",
+    TB_DIR / "tb_stimulus.v",
+]
+
+TOPLEVEL    = "tb_stimulus"
+TEST_MODULE = "test_pcs_10g"
+
+TESTCASES = [
+    "test_reset",
+    "test_idle_transmission",
+    "test_block_lock",
+    "test_frame_tx",
+    "test_scrambler_roundtrip",
+    "test_back_to_back_frames",
+    "test_pcs_status",
+    "test_continuous_stream",
+    "test_latency",
+    "test_error_handling",
+]
+
+
+@pytest.mark.parametrize("testcase", TESTCASES)
+def test_pcs_10g(testcase):
+    build_dir = TB_DIR / "sim_build" / testcase
+
+    runner = get_runner("icarus")
+    runner.build(
+        sources=SOURCES,
+        includes=[RTL_DIR],
+        hdl_toplevel=TOPLEVEL,
+        build_dir=build_dir,
+        always=True,
+        waves=False,
+    )
+    runner.test(
+        test_module=TEST_MODULE,
+        hdl_toplevel=TOPLEVEL,
+        testcase=testcase,
+        build_dir=build_dir,
+        waves=False,
+        extra_env={
+            "COCOTB_LOG_LEVEL": os.environ.get("COCOTB_LOG_LEVEL", "WARNING"),
+        },
+    )